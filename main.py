@@ -1,31 +1,38 @@
-from typing import List, Dict, Optional, Any, TypedDict
+from typing import List, Dict, Optional, Any, TypedDict, Callable, Awaitable, Iterator
 import os
+import itertools
 from dotenv import load_dotenv
-import requests
+import asyncio
+import aiohttp
+import certifi
+import ssl
+import orjson
 import redis
 from datetime import datetime
 import smtplib
 from email.mime.text import MIMEText
 import argparse
+import math
 from dataclasses import dataclass
 
-class Location(TypedDict):
-    name: str
-
 class Department(TypedDict):
     name: str
     jobs: List[Dict[str, Any]]
     children: Optional[List['Department']]
 
-class Job(TypedDict):
+@dataclass(slots=True)
+class JobRecord:
     title: str
     content: Optional[str]
-    location: Location
+    location_name: str
     updated_at: str
     absolute_url: str
     company: Optional[str]
 
-@dataclass
+# Coroutine that fetches one configured job board
+JobFetcher = Callable[['JobScanner', aiohttp.ClientSession, Dict[str, str]], Awaitable[Iterator[JobRecord]]]
+
+@dataclass(slots=True, frozen=True)
 class ScannerConfig:
     use_redis: bool
     send_emails: bool
@@ -36,18 +43,67 @@ class MockRedis:
     def __init__(self) -> None:
         self.seen_jobs: set[str] = set()
         
-    def sismember(self, key: str, value: str) -> bool:
-        return value in self.seen_jobs
+    def smembers(self, key: str) -> set[str]:
+        return set(self.seen_jobs)
+        
+    def smismember(self, key: str, *values: str) -> List[int]:
+        return [int(value in self.seen_jobs) for value in values]
         
-    def sadd(self, key: str, value: str) -> None:
-        self.seen_jobs.add(value)
+    def sadd(self, key: str, *values: str) -> None:
+        self.seen_jobs.update(values)
+
+# OpenAI uses a GraphQL API; the query never changes so it is serialized once
+_OPENAI_PAYLOAD_BYTES: bytes = orjson.dumps({
+    "operationName": "ApiJobBoardWithTeams",
+    "variables": {
+        "organizationHostedJobsPageName": "openai"
+    },
+    "query": """
+    query ApiJobBoardWithTeams($organizationHostedJobsPageName: String!) {
+      jobBoard: jobBoardWithTeams(
+        organizationHostedJobsPageName: $organizationHostedJobsPageName
+      ) {
+        teams {
+          id
+          name
+          parentTeamId
+          __typename
+        }
+        jobPostings {
+          id
+          title
+          teamId
+          locationId
+          locationName
+          employmentType
+          secondaryLocations {
+            locationId
+            locationName
+            __typename
+          }
+          compensationTierSummary
+          __typename
+        }
+        __typename
+      }
+    }"""
+})
 
 class JobScanner:
+    JSON_HEADERS = {"Content-Type": "application/json"}
+    SEPARATOR = "\n" + "-"*50 + "\n\n"
+
     def __init__(self, config: ScannerConfig) -> None:
         self.email_address: str = os.getenv('EMAIL_ADDRESS', '')
         self.email_password: str = os.getenv('EMAIL_PASSWORD', '')
         self.title_keywords: List[str] = config.title_keywords
+        self._keywords_folded: tuple[str, ...] = tuple(keyword.casefold() for keyword in config.title_keywords)
         self.config = config
+        self.max_concurrent_fetches: int = 10
+        self._http: Optional[aiohttp.ClientSession] = None
+        self.max_retries: int = 3
+        self.retry_backoff: float = 0.3
+        self.retry_statuses: frozenset[int] = frozenset({429, 502, 503, 504})
         
         # API configurations
         self.api_config = [
@@ -71,94 +127,110 @@ class JobScanner:
         # Redis setup
         if config.use_redis:
             redis_url: str = os.getenv('REDISCLOUD_URL', '')
-            self.redis = redis.from_url(redis_url)
+            self.redis = redis.from_url(redis_url, decode_responses=True)
         else:
             print("Using mock Redis for testing")
             self.redis = MockRedis()
 
-    def fetch_greenhouse_jobs(self, config: Dict[str, str]) -> List[Job]:
+        # When set, seen jobs are loaded from Redis on the first scan and checked locally afterwards
+        self.cache_seen_jobs: bool = False
+        self._seen_jobs: Optional[set[str]] = None
+        # Newly seen jobs, written back to Redis once per scan
+        self._pending_seen_jobs: set[str] = set()
+
+    async def __aenter__(self) -> 'JobScanner':
+        # One HTTP session is kept open for every scan run inside this context
+        self._http = self._create_session()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        """Create an HTTP session that keeps connections alive across requests"""
+        # aiohttp already negotiates gzip/deflate and reuses pooled connections
+        # Verify TLS against certifi's CA bundle, as requests did, rather than the system store
+        ssl_context = ssl.create_default_context(cafile=certifi.where())
+        connector = aiohttp.TCPConnector(limit_per_host=8, ssl=ssl_context)
+        return aiohttp.ClientSession(connector=connector)
+
+    async def _request_with_retries(self, session: aiohttp.ClientSession, method: str, url: str,
+                                    **kwargs: Any) -> bytes:
+        """Send a request and return the response body, retrying connection errors and transient statuses with backoff"""
+        for attempt in range(self.max_retries + 1):
+            final_attempt = attempt == self.max_retries
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    if final_attempt or response.status not in self.retry_statuses:
+                        response.raise_for_status()
+                        return await response.read()
+            except aiohttp.ClientConnectionError:
+                if final_attempt:
+                    raise
+
+            await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+        raise AssertionError("unreachable: the final attempt returns or raises")
+
+    async def fetch_greenhouse_jobs(self, session: aiohttp.ClientSession, config: Dict[str, str]) -> Iterator[JobRecord]:
         """Fetch jobs from Greenhouse API"""
-        all_jobs: List[Job] = []
         try:
-            dept_response: requests.Response = requests.get(f"{config['url']}/departments")
-            dept_response.raise_for_status()
-            departments: List[Department] = dept_response.json()['departments']
-            
+            dept_body = await self._request_with_retries(session, 'GET', f"{config['url']}/departments")
+            departments: List[Department] = orjson.loads(dept_body)['departments']
+        except Exception as e:
+            print(f"Error fetching Greenhouse jobs for {config['company']}: {e}")
+            return iter(())
+        
+        return self._iter_greenhouse_jobs(departments, config)
+
+    def _iter_greenhouse_jobs(self, departments: List[Department], config: Dict[str, str]) -> Iterator[JobRecord]:
+        """Yield jobs from Greenhouse departments and their children"""
+        try:
             for dept in departments:
                 # Handle jobs in the main department
                 if dept.get('jobs'):
                     for job in dept['jobs']:
-                        job_copy = dict(job)
-                        job_copy['company'] = config['company']
-                        all_jobs.append(job_copy)
+                        yield self._greenhouse_job_record(job, config)
                 
                 # Handle jobs in child departments
                 if dept.get('children'):
                     for child in dept['children']:
                         if child.get('jobs'):
                             for job in child['jobs']:
-                                job_copy = dict(job)
-                                job_copy['company'] = config['company']
-                                all_jobs.append(job_copy)
+                                yield self._greenhouse_job_record(job, config)
                                 
         except Exception as e:
-            print(f"Error fetching Greenhouse jobs for {config['company']}: {e}")
-        
-        return all_jobs
+            print(f"Error parsing Greenhouse jobs for {config['company']}: {e}")
 
-    def fetch_openai_jobs(self, config: Dict[str, str]) -> List[Job]:
+    def _greenhouse_job_record(self, job: Dict[str, Any], config: Dict[str, str]) -> JobRecord:
+        """Build a JobRecord from a Greenhouse job"""
+        return JobRecord(
+            title=job['title'],
+            content=job.get('content'),
+            location_name=(job.get('location') or {}).get('name', ''),
+            updated_at=job.get('updated_at', ''),
+            absolute_url=job['absolute_url'],
+            company=config['company']
+        )
+
+    async def fetch_openai_jobs(self, session: aiohttp.ClientSession, config: Dict[str, str]) -> Iterator[JobRecord]:
         """Fetch jobs from OpenAI's API"""
-        all_jobs: List[Job] = []
         try:
             # OpenAI uses a GraphQL API
-            headers = {
-                "Content-Type": "application/json"
-            }
-            
-            # GraphQL query for jobs
-            payload = {
-                "operationName": "ApiJobBoardWithTeams",
-                "variables": {
-                    "organizationHostedJobsPageName": "openai"
-                },
-                "query": """
-                query ApiJobBoardWithTeams($organizationHostedJobsPageName: String!) {
-                  jobBoard: jobBoardWithTeams(
-                    organizationHostedJobsPageName: $organizationHostedJobsPageName
-                  ) {
-                    teams {
-                      id
-                      name
-                      parentTeamId
-                      __typename
-                    }
-                    jobPostings {
-                      id
-                      title
-                      teamId
-                      locationId
-                      locationName
-                      employmentType
-                      secondaryLocations {
-                        locationId
-                        locationName
-                        __typename
-                      }
-                      compensationTierSummary
-                      __typename
-                    }
-                    __typename
-                  }
-                }"""
-            }
-            
-            response = requests.post(config['url'], json=payload, headers=headers)
-            response.raise_for_status()
-            jobs_data = response.json()
-            
-            # Transform OpenAI job format to match our Job type
-            jobs_data = response.json()
+            response_body = await self._request_with_retries(session, 'POST', config['url'],
+                                                             data=_OPENAI_PAYLOAD_BYTES, headers=self.JSON_HEADERS)
+            jobs_data = orjson.loads(response_body)
+        except Exception as e:
+            print(f"Error fetching OpenAI jobs: {e}")
+            return iter(())
             
+        return self._iter_openai_jobs(jobs_data, config)
+
+    def _iter_openai_jobs(self, jobs_data: Dict[str, Any], config: Dict[str, str]) -> Iterator[JobRecord]:
+        """Yield OpenAI job postings transformed into JobRecords"""
+        try:
             job_postings = jobs_data.get('data', {}).get('jobBoard', {}).get('jobPostings', [])
             teams = {team['id']: team['name'] for team in jobs_data.get('data', {}).get('jobBoard', {}).get('teams', [])}
             
@@ -170,74 +242,118 @@ class JobScanner:
                 team_name = teams.get(job.get('teamId'), '')
                 compensation = job.get('compensationTierSummary', 'Not specified')
                 
-                job_data: Job = {
-                    'title': job['title'],
-                    'content': f"Team: {team_name}\nCompensation: {compensation}\nEmployment Type: {job.get('employmentType', 'Not specified')}",
-                    'location': {'name': location_name},
-                    'updated_at': datetime.now().isoformat(),
-                    'absolute_url': f"https://jobs.ashbyhq.com/openai/{job['id']}",
-                    'company': config['company']
-                }
-                all_jobs.append(job_data)
+                yield JobRecord(
+                    title=job['title'],
+                    content=f"Team: {team_name}\nCompensation: {compensation}\nEmployment Type: {job.get('employmentType', 'Not specified')}",
+                    location_name=location_name,
+                    updated_at=datetime.now().isoformat(),
+                    absolute_url=f"https://jobs.ashbyhq.com/openai/{job['id']}",
+                    company=config['company']
+                )
                 
         except Exception as e:
-            print(f"Error fetching OpenAI jobs: {e}")
-            
-        return all_jobs
+            print(f"Error parsing OpenAI jobs: {e}")
 
-    def fetch_jobs(self) -> List[Job]:
-        """Fetch all jobs from configured APIs"""
-        all_jobs: List[Job] = []
-        
+    # Fetcher for each API type in api_config
+    _HANDLERS: Dict[str, JobFetcher] = {
+        'greenhouse': fetch_greenhouse_jobs,
+        'openai': fetch_openai_jobs,
+    }
+
+    async def fetch_jobs(self) -> Iterator[JobRecord]:
+        """Fetch all jobs from configured APIs concurrently, yielding them lazily"""
+        if self._http is None:
+            raise RuntimeError("JobScanner must be used as an async context manager to fetch jobs")
+
+        board_jobs: List[Iterator[JobRecord]] = []
+        semaphore = asyncio.BoundedSemaphore(self.max_concurrent_fetches)
+
+        async def bounded(handler: JobFetcher, session: aiohttp.ClientSession,
+                          config: Dict[str, str]) -> Iterator[JobRecord]:
+            async with semaphore:
+                return await handler(self, session, config)
+
+        tasks = []
         for config in self.api_config:
-            if config['type'] == 'greenhouse':
-                jobs = self.fetch_greenhouse_jobs(config)
-            elif config['type'] == 'openai':
-                jobs = self.fetch_openai_jobs(config)
-            else:
+            handler = self._HANDLERS.get(config['type'])
+            if handler is None:
                 print(f"Unknown API type: {config['type']}")
                 continue
-                
-            all_jobs.extend(jobs)
+
+            tasks.append(bounded(handler, self._http, config))
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        for jobs in results:
+            if isinstance(jobs, BaseException):
+                print(f"Error fetching jobs: {jobs}")
+                continue
+
+            board_jobs.append(jobs)
     
-        return all_jobs
+        return itertools.chain.from_iterable(board_jobs)
 
     def _check_title_keywords(self, job_title: str) -> bool:
         """Check if job title matches any required title keywords"""
-        if not self.title_keywords:
+        if not self._keywords_folded:
             return True
         
-        title_lower = job_title.lower()
-        return any(keyword.lower() in title_lower for keyword in self.title_keywords)
+        title_folded = job_title.casefold()
+        return any(keyword in title_folded for keyword in self._keywords_folded)
+
+    def filter_unseen_jobs(self, jobs: List[JobRecord]) -> List[JobRecord]:
+        """Return the jobs we haven't seen before"""
+        if self.cache_seen_jobs:
+            # Loaded here rather than in __init__ so a failed load is retried on the next scan
+            if self._seen_jobs is None:
+                self._seen_jobs = set(self.redis.smembers('seen_jobs'))
+            return [job for job in jobs if job.absolute_url not in self._seen_jobs]
 
-    def is_job_seen(self, job_url: str) -> bool:
-        """Check if we've seen this job before"""
-        return bool(self.redis.sismember('seen_jobs', job_url))
+        # A single scan only needs to ask about the matching jobs, in one SMISMEMBER call
+        if not jobs:
+            return []
+
+        seen_flags = self.redis.smismember('seen_jobs', *[job.absolute_url for job in jobs])
+        return [job for job, seen in zip(jobs, seen_flags) if not seen]
 
     def mark_job_seen(self, job_url: str) -> None:
-        """Mark a job as seen"""
-        self.redis.sadd('seen_jobs', job_url)
+        """Mark a job as seen, to be saved to Redis by flush_seen_jobs"""
+        if self._seen_jobs is not None:
+            self._seen_jobs.add(job_url)
+        self._pending_seen_jobs.add(job_url)
+
+    def flush_seen_jobs(self) -> None:
+        """Save newly seen jobs to Redis with a single SADD call"""
+        if self._pending_seen_jobs:
+            self.redis.sadd('seen_jobs', *self._pending_seen_jobs)
+            self._pending_seen_jobs.clear()
 
-    def send_email_alert(self, new_jobs: List[Job]) -> bool:
+    def send_email_alert(self, new_jobs: List[JobRecord]) -> bool:
         """Send email alert for new jobs"""
-        email_body: str = "New job postings found:\n\n"
+        parts: List[str] = ["New job postings found:\n\n"]
         
         for job in new_jobs:
-            email_body += f"Title: {job['title']}\n"
-            email_body += f"Company: {job['company']}\n"
-            email_body += f"Location: {job['location']['name']}\n"
-            email_body += f"Apply here: {job['absolute_url']}\n"
-            email_body += "\n" + "-"*50 + "\n\n"
+            parts.append(
+                f"Title: {job.title}\n"
+                f"Company: {job.company}\n"
+                f"Location: {job.location_name}\n"
+                f"Apply here: {job.absolute_url}\n"
+                + self.SEPARATOR
+            )
+
+        email_body: str = ''.join(parts)
 
         if not self.config.send_emails:
             print("\nEmail would have contained:")
             print(email_body)
             return True
 
+        job_count = len(new_jobs)
+        positions = "position" if job_count == 1 else "positions"
+
         msg: MIMEText = MIMEText(email_body)
-        msg['Subject'] = f"New Jobs Alert - {len(new_jobs)} new {"position" if len(new_jobs) == 1 else "positions"} found"
-        msg['From'] = self.email_address
-        msg['To'] = self.email_address
+        msg['Subject'] = f"New Jobs Alert - {job_count} new {positions} found"
+        msg['From'] = msg['To'] = self.email_address
 
         sent_email = False
 
@@ -252,37 +368,52 @@ class JobScanner:
 
         return sent_email
 
-    def check_jobs(self) -> None:
+    async def check_jobs(self) -> None:
         """Main function to check for new jobs"""
         try:
             print(f"Starting job scan at {datetime.now()}")
-            all_jobs: List[Job] = self.fetch_jobs()
-            new_jobs: List[Job] = []
-
-            for job in all_jobs:
-                # Check if the title matches keywords
-                if not self._check_title_keywords(job['title']):
-                    continue
-                    
-                job_url: str = job['absolute_url']
-                
-                # Check if we haven't seen this job before
-                if not self.is_job_seen(job_url):
-                    new_jobs.append(job)
+            # Check if the title matches keywords, keeping only the matches
+            jobs: Iterator[JobRecord] = await self.fetch_jobs()
+            matching_jobs: List[JobRecord] = [job for job in jobs if self._check_title_keywords(job.title)]
+
+            # Check which of them we haven't seen before
+            new_jobs: List[JobRecord] = self.filter_unseen_jobs(matching_jobs)
             
             if new_jobs:
                 # Only mark the jobs as seen if the email sent successfully
                 if self.send_email_alert(new_jobs):
                     for job in new_jobs:
-                        self.mark_job_seen(job['absolute_url'])
+                        self.mark_job_seen(job.absolute_url)
 
                 print(f"Found and reported {len(new_jobs)} new jobs")
             else:
                 print("No new matching jobs found")
+
+            # Also retries any writes left over from a scan where Redis was unavailable
+            self.flush_seen_jobs()
                 
         except Exception as e:
             print(f"Error during job scan: {e}")
 
+    async def run(self, interval: Optional[float] = None) -> None:
+        """Scan once, or every `interval` seconds if given, reusing connections between scans"""
+        # Caching the seen set only pays off when it is reused across scans
+        self.cache_seen_jobs = interval is not None
+        async with self:
+            while True:
+                await self.check_jobs()
+                if interval is None:
+                    break
+
+                await asyncio.sleep(interval)
+
+def positive_interval(value: str) -> float:
+    """Parse --interval, rejecting values that would make the scan loop spin or never run again"""
+    interval = float(value)
+    if not math.isfinite(interval) or interval <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive number of seconds, got {value}")
+    return interval
+
 if __name__ == "__main__":
     load_dotenv()
     
@@ -293,6 +424,8 @@ if __name__ == "__main__":
                       help='Skip sending emails but use Redis')
     parser.add_argument('--title-keywords', type=str, nargs='+', default=['engineer', 'fellow', 'resident', 'residency'],
                       help='Keywords to filter job titles (case insensitive)')
+    parser.add_argument('--interval', type=positive_interval, default=None,
+                      help='Keep running and scan every INTERVAL seconds instead of scanning once')
     args = parser.parse_args()
 
     # Configure based on arguments
@@ -303,4 +436,4 @@ if __name__ == "__main__":
     )
     
     scanner = JobScanner(config)
-    scanner.check_jobs()
\ No newline at end of file
+    asyncio.run(scanner.run(args.interval))
\ No newline at end of file